@@ -4,10 +4,11 @@ import random
 import logging
 from uuid import uuid4
 from datetime import datetime as dt
-from flask_restx import Api, Resource
+from flask_restx import Api, Resource, abort
 from database.models import db, APICall
 from database.helpers import add_record
-from flask import request
+from flask import Response, current_app, request, stream_with_context
+import serialization
 
 
 api = Api(
@@ -35,6 +36,13 @@ air_parser.add_argument(
 air_parser.add_argument("option1", help="Optional parameter")
 air_parser.add_argument("option2", help="Optional parameter")
 air_parser.add_argument("culture")
+air_parser.add_argument(
+    "format",
+    choices=serialization.RESPONSE_FORMATS,
+    default=serialization.ROWS_FORMAT,
+    help="Layout of the results: 'rows' of typed cells (default), compact 'columnar' "
+    "arrays or 'ndjson' rows streamed while pricing",
+)
 air_parser.add_argument("UserName", location="headers")
 air_parser.add_argument("Machine", location="headers")
 
@@ -85,7 +93,11 @@ def replace_empty_values(data, replacement=""):
 def clean_json_values(args, key):
     # Get the values from the POST request arguments
     result = args.get(key) or '[["#N/A"]]'
-    result = json.loads(result)
+
+    # Form fields hold JSON strings, decoded as the Excel add-in has always relied
+    # on (NaN, Infinity, ...). Native bodies already hold nested arrays.
+    if isinstance(result, (str, bytes)):
+        result = json.loads(result)
 
     # Delete empty values from inputs
     result = remove_empty_rows_and_cols(result)
@@ -109,15 +121,195 @@ def transpose(data: list) -> list:
     return list(map(list, zip(*data)))
 
 
+def price_air(pricing):
+    """
+    Price a single row of the Pricing Grid.
+
+    Parameters:
+        pricing (dict): The Pricing Parameters Names mapped to their Values.
+
+    Returns:
+        list of dict: The typed result cells of the pricing.
+    """
+    return [
+        {"Value": f"AIR - {uuid4()}", "Type": "string"},
+        {"Value": 1 + random.random(), "Type": "float"},
+        {"Value": dt.today().strftime("%Y-%m-%d"), "Type": "date"},
+        # {"Value": dt.today(), "Type": "date"},
+    ]
+
+
+def stream_air_pricing(pricings, args, audit, start_time):
+    """
+    Stream the priced rows as NDJSON while pricing continues.
+
+    Each line holds one row as `{"row": index, "data": cells}`; a row that fails
+    to price carries an "AIR Error" cell instead, without stopping the stream.
+    A last `{"done": true, "rows": ..., "errors": ...}` line closes the stream.
+    The API call is recorded when the response is closed, whether the stream
+    completed, was interrupted, or never started.
+
+    Parameters:
+        pricings (iterable of dict): The pricings to run.
+        args (dict): The request arguments.
+        audit (dict): The user and request details of the API call record.
+        start_time (float): The time the request was received.
+
+    Returns:
+        flask.Response: The streaming response.
+    """
+
+    progress = {"rows": 0, "errors": 0, "completed": False}
+
+    def generate():
+        for pricing in pricings:
+            try:
+                data = price_air(pricing)
+            except Exception as e:
+                logging.error(
+                    f"Error processing AIR Pricing row {progress['rows']}: {str(e)}"
+                )
+                data = [{"Value": f"AIR Error: {e}", "Type": "string"}]
+                progress["errors"] += 1
+
+            yield serialization.dumps_line({"row": progress["rows"], "data": data})
+            progress["rows"] += 1
+
+        yield serialization.dumps_line(
+            {"done": True, "rows": progress["rows"], "errors": progress["errors"]}
+        )
+        progress["completed"] = True
+
+    # The request context is gone once the response is closed
+    app = current_app._get_current_object()
+
+    def record():
+        error_message = None
+        if not progress["completed"]:
+            error_message = f"Stream interrupted after {progress['rows']} rows"
+        elif progress["errors"]:
+            error_message = f"{progress['errors']} of {progress['rows']} rows failed"
+
+        # Log the streamed API call to the database
+        with app.app_context():
+            add_record(
+                APICall,
+                **audit,
+                parameters=serialization.dumps_text(args),
+                response_time=(time.time() - start_time) * 1000,
+                status_code=200,  # Headers are sent before the first row
+                error_message=error_message,
+            )
+
+    response = Response(
+        stream_with_context(generate()), mimetype=serialization.NDJSON_MIMETYPE
+    )
+    response.call_on_close(record)
+
+    return response
+
+
+def parse_air_args():
+    """
+    Read the AIR Pricing arguments of the current request.
+
+    The Excel add-in sends form-encoded fields holding JSON strings, which go
+    through `air_parser`. A JSON or MessagePack body holding nested arrays is
+    decoded once instead, with the user details still read from the headers.
+
+    Returns:
+        dict: The request arguments.
+    """
+    if not serialization.is_native_request(request):
+        return air_parser.parse_args()
+
+    try:
+        args = serialization.decode_body(request)
+    except serialization.UnsupportedMediaType as e:
+        abort(415, str(e))
+    except ValueError as e:
+        abort(400, f"Invalid request body: {e}")
+
+    # Same validation and default as the "format" argument of air_parser
+    args.setdefault("format", serialization.ROWS_FORMAT)
+    if args["format"] not in serialization.RESPONSE_FORMATS:
+        abort(
+            400,
+            f"Invalid format: {args['format']!r}, expected one of "
+            f"{', '.join(serialization.RESPONSE_FORMATS)}",
+        )
+
+    args["UserName"] = request.headers.get("UserName")
+    args["Machine"] = request.headers.get("Machine")
+
+    return args
+
+
+def make_air_response(data, args, errors=0):
+    """
+    Wrap the pricing results, encoding them with the fast path for native requests.
+
+    With `format=columnar` the results are sent as column arrays, compressed
+    when the client accepts gzip or deflate. With `format=ndjson` they are sent
+    as the lines of a stream, e.g. for an error raised before streaming started.
+
+    Parameters:
+        data (list of list): The pricing results.
+        args (dict): The request arguments.
+        errors (int): The number of rows of `data` holding an error.
+
+    Returns:
+        dict or flask.Response: The response of the endpoint.
+    """
+    if args.get("format") == serialization.NDJSON_FORMAT:
+        lines = [
+            serialization.dumps_line({"row": index, "data": row})
+            for index, row in enumerate(data)
+        ]
+        lines.append(
+            serialization.dumps_line({"done": True, "rows": len(data), "errors": errors})
+        )
+        return Response(b"".join(lines), mimetype=serialization.NDJSON_MIMETYPE)
+
+    if args.get("format") == serialization.COLUMNAR_FORMAT:
+        return serialization.encode_response(
+            serialization.to_columnar(data),
+            serialization.response_mimetype(request),
+            encoding=serialization.content_encoding(request),
+        )
+
+    payload = {"data": data}
+
+    if serialization.is_native_request(request):
+        return serialization.encode_response(
+            payload, serialization.response_mimetype(request)
+        )
+
+    return payload
+
+
 @ns_air.route("")
-@api.doc(description="Endpoint to handle AIR Pricing")
+@api.doc(
+    description="Endpoint to handle AIR Pricing. Accepts the form-encoded fields of "
+    "the Excel add-in, or a JSON / MessagePack body with `parameters` and `values` "
+    "as nested arrays. Set `format=columnar` for compact column arrays, compressed "
+    "with gzip or deflate when accepted by the client, or `format=ndjson` to stream "
+    "the rows while they are priced."
+)
 class AirPricing(Resource):
     @api.expect(air_parser)
-    @api.doc(responses={200: "Success", 400: "Validation Error", 403: "Not Authorized"})
+    @api.doc(
+        responses={
+            200: "Success",
+            400: "Validation Error",
+            403: "Not Authorized",
+            415: "Unsupported Media Type",
+        }
+    )
     def post(self):
         start_time = time.time()  # Start timer to measure response time
 
-        args = air_parser.parse_args()
+        args = parse_air_args()
         machine = args.get("Machine", "Unknown Machine")
         username = args.get("UserName", "Unknown User")
         client_ip = request.remote_addr
@@ -152,21 +344,29 @@ class AirPricing(Resource):
                 parameters = transpose(parameters)
                 values = transpose(values)
 
-            # Turn the inputs to list of pricings
-            pricings = [{x: y for x, y in zip(parameters[0], z)} for z in values]
+            # Turn the inputs to pricings, built lazily as they are priced. The
+            # header is read now so that an empty grid fails before streaming.
+            header = parameters[0]
+            pricings = ({x: y for x, y in zip(header, z)} for z in values)
 
-            # Initialize Results and Results Type
-            data = []
+            # Stream the priced rows instead of building the whole results
+            if args.get("format") == serialization.NDJSON_FORMAT:
+                logging.info(msg)
 
-            for pricing in pricings:
-                data.append(
-                    [
-                        {"Value": f"AIR - {uuid4()}", "Type": "string"},
-                        {"Value": 1 + random.random(), "Type": "float"},
-                        {"Value": dt.today().strftime("%Y-%m-%d"), "Type": "date"},
-                        # {"Value": dt.today(), "Type": "date"},
-                    ],
-                )
+                audit = {
+                    "machine": machine,
+                    "username": username,
+                    "client_ip": client_ip,
+                    "endpoint": endpoint,
+                    "method": method,
+                    "user_agent": user_agent,
+                    "referrer": referrer,
+                }
+
+                return stream_air_pricing(pricings, args, audit, start_time)
+
+            # Price every row of the grid
+            data = [price_air(pricing) for pricing in pricings]
 
             logging.info(msg)
 
@@ -183,13 +383,13 @@ class AirPricing(Resource):
                 method=method,
                 user_agent=user_agent,
                 referrer=referrer,
-                parameters=json.dumps(args),  # Serialize args to JSON string
+                parameters=serialization.dumps_text(args),  # Serialize args to JSON string
                 response_time=response_time,
                 status_code=200,  # Assuming success at this point
                 # response_body can be added
             )
 
-            return {"data": data}
+            return make_air_response(data, args)
 
         except Exception as e:
             # Log the error message
@@ -205,7 +405,7 @@ class AirPricing(Resource):
                 method=method,
                 user_agent=user_agent,
                 referrer=referrer,
-                parameters=json.dumps(args) if args else None,
+                parameters=serialization.dumps_text(args) if args else None,
                 response_time=(time.time() - start_time) * 1000,
                 status_code=500,  # Internal Server Error
                 error_message=str(e),
@@ -214,7 +414,7 @@ class AirPricing(Resource):
 
             data = [[{"Value": f"AIR Error: {e}", "Type": "string"}]]
 
-            return {"data": data}
+            return make_air_response(data, args, errors=1)
 
 
 # Registering the resource with the API
@@ -0,0 +1,175 @@
+"""
+Benchmark and load-test suite for the AIR API and the stats dashboard.
+
+Run from the repository root:
+    python -m benchmarks run --output results.json
+    python -m benchmarks run --suite stats --rows 1000,1000000
+    python -m benchmarks run --suite api --content-types json --formats ndjson
+    python -m benchmarks compare baseline.json results.json
+"""
+import os
+import sys
+import logging
+import argparse
+import tempfile
+
+from . import dashboard, load, parsing
+from .measure import compare_results, load_results, write_results
+
+
+def parse_sizes(value):
+    return [int(size.replace("_", "")) for size in value.split(",")]
+
+
+def parse_names(value):
+    return [name.strip() for name in value.split(",")]
+
+
+def create_server(database_url):
+    """
+    Create the Flask app as index.create_app does, bound to a dedicated database
+    so that benchmarks never touch real data.
+    """
+    from flask import Flask
+    from api import api
+    from config import Config
+    from database.database import db
+
+    server = Flask(__name__)
+    server.config.from_object(Config)
+    server.config["SQLALCHEMY_DATABASE_URI"] = database_url
+
+    db.init_app(server)
+    api.init_app(server)
+
+    with server.app_context():
+        db.create_all()
+
+    # Keep the per-request logs of /api/air out of the timings
+    logging.getLogger().setLevel(logging.WARNING)
+
+    return server
+
+
+def run(args):
+    database_url = args.database_url
+    if database_url is None:
+        database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'benchmark.db')}"
+
+    server = create_server(database_url)
+    results = []
+
+    if args.suite in ("api", "all"):
+        results += load.run(
+            server,
+            grid_sizes=args.grid_sizes,
+            content_types=args.content_types,
+            formats=args.formats,
+            concurrency=args.concurrency,
+            requests_per_worker=args.requests,
+        )
+
+    if args.suite in ("parsing", "all"):
+        results += parsing.run(grid_sizes=args.parsing_sizes)
+
+    if args.suite in ("stats", "all"):
+        results += dashboard.run(server, table_sizes=args.rows)
+
+    write_results(results, args.output)
+
+
+def compare(args):
+    comparisons = compare_results(
+        load_results(args.baseline), load_results(args.current), args.threshold
+    )
+
+    for comparison in comparisons:
+        flag = "REGRESSION" if comparison["regression"] else ""
+        print(
+            f"{comparison['suite']:<6} {str(comparison['scenario']):<60} "
+            f"{comparison['baseline_p95_ms']:>10.2f} -> {comparison['current_p95_ms']:>10.2f} ms "
+            f"({comparison['p95_change_pct']:+.1f}%) {flag}"
+        )
+
+    # A non-zero exit code lets CI fail on regressions
+    return 1 if any(comparison["regression"] for comparison in comparisons) else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks", description=__doc__.strip().splitlines()[0]
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run the benchmarks")
+    run_parser.add_argument(
+        "--suite", choices=("api", "parsing", "stats", "all"), default="all"
+    )
+    run_parser.add_argument(
+        "--grid-sizes",
+        type=parse_sizes,
+        default=list(load.GRID_SIZES),
+        help="Comma-separated numbers of pricings per /api/air request",
+    )
+    run_parser.add_argument(
+        "--content-types",
+        type=parse_names,
+        default=list(load.CONTENT_TYPES),
+        help="Comma-separated request content types: form, json, msgpack",
+    )
+    run_parser.add_argument(
+        "--formats",
+        type=parse_names,
+        default=list(load.FORMATS),
+        help="Comma-separated response formats: rows, columnar, ndjson",
+    )
+    run_parser.add_argument(
+        "--concurrency",
+        type=parse_sizes,
+        default=list(load.CONCURRENCY),
+        help="Comma-separated numbers of concurrent clients",
+    )
+    run_parser.add_argument(
+        "--requests",
+        type=int,
+        default=load.REQUESTS_PER_WORKER,
+        help="Number of requests sent by each client",
+    )
+    run_parser.add_argument(
+        "--parsing-sizes",
+        type=parse_sizes,
+        default=list(parsing.GRID_SIZES),
+        help="Comma-separated numbers of pricings for the parse/serialize round trips",
+    )
+    run_parser.add_argument(
+        "--rows",
+        type=parse_sizes,
+        default=list(dashboard.TABLE_SIZES),
+        help="Comma-separated numbers of synthetic APICall records, from 1K to 10M",
+    )
+    run_parser.add_argument(
+        "--database-url",
+        help="Database to benchmark against, a temporary SQLite file if omitted",
+    )
+    run_parser.add_argument("--output", help="JSON results file, stdout if omitted")
+
+    compare_parser = subparsers.add_parser("compare", help="Compare two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=10.0,
+        help="p95 increase in percent reported as a regression",
+    )
+
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        sys.exit(compare(args))
+
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
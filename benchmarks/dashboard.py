@@ -0,0 +1,81 @@
+"""
+Timings of the stats page callbacks over synthetic APICall tables.
+"""
+import time
+
+from .data import populate
+from .measure import peak_traced_mb, summarize, timed
+
+TABLE_SIZES = (1_000, 10_000, 100_000)
+REPEAT = 5
+
+
+def unwrap(callback):
+    """
+    Return the function decorated by a Dash callback, so it can be called directly.
+    """
+    return getattr(callback, "__wrapped__", callback)
+
+
+def time_callback(name, rows, func, *args):
+    """
+    Call a callback `REPEAT` times and summarize its timings.
+
+    Returns:
+        tuple: The last result of the callback and the summary of its timings.
+    """
+    timings = []
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        result, elapsed = timed(func, *args)
+        timings.append(elapsed)
+    wall_time = time.perf_counter() - start
+
+    # One more, untimed, call to measure the memory of the callback alone
+    peak_mb = peak_traced_mb(func, *args)
+
+    scenario = {"callback": name, "rows": rows}
+    return result, summarize("stats", scenario, timings, wall_time, peak_mb)
+
+
+def run(server, table_sizes=TABLE_SIZES):
+    """
+    Time `update_data`, `update_kpi_cards` and `update_table` for each table size.
+
+    The APICall table is emptied and refilled with synthetic records for every
+    size, smallest first. The records all fall inside the window read by
+    `update_data`, and each result reports how many records were read.
+
+    Returns:
+        list of dict: One result per callback and table size.
+    """
+    from pages import stats
+    from database.models import APICall
+    from database.helpers import delete_all_records
+
+    update_data = unwrap(stats.update_data)
+    update_kpi_cards = unwrap(stats.update_kpi_cards)
+    update_table = unwrap(stats.update_table)
+
+    # Timestamps start at midnight of the first day: one day less stays in the window
+    days = max(server.config["STATS_WINDOW_DAYS"] - 1, 0)
+    results = []
+
+    for rows in sorted(table_sizes):
+        with server.test_request_context("/stats"):
+            delete_all_records(APICall)
+            populate(APICall, rows, days=days)
+
+            data, result = time_callback("update_data", rows, update_data, "/stats")
+            results.append(result)
+
+            _, result = time_callback("update_kpi_cards", rows, update_kpi_cards, data)
+            results.append(result)
+
+            _, result = time_callback("update_table", rows, update_table, data)
+            results.append(result)
+
+            for result in results[-3:]:
+                result["records"] = len(data)
+
+    return results
@@ -0,0 +1,122 @@
+"""
+Synthetic APICall records with realistic user, endpoint and latency distributions.
+"""
+import json
+import math
+import random
+from itertools import accumulate
+from datetime import datetime as dt, timedelta
+
+BATCH_SIZE = 10_000
+
+# A few heavy users and a long tail, as with the Excel add-in in branch offices
+USERS = [f"user{i:03d}" for i in range(200)]
+USER_WEIGHTS = [1 / (rank + 1) for rank in range(len(USERS))]
+
+ENDPOINTS = [("/api/air", "POST", 0.95), ("/swagger/", "GET", 0.05)]
+
+STATUS_CODES = [(200, 0.96), (400, 0.02), (500, 0.02)]
+
+# Calls mostly happen during business hours
+HOUR_WEIGHTS = [1, 1, 1, 1, 1, 2, 4, 10, 20, 25, 25, 20, 15, 20, 25, 25, 20, 12, 6, 3, 2, 1, 1, 1]
+
+USER_AGENTS = ["AIR Excel Add-in/2.3", "AIR Excel Add-in/2.4", "python-requests/2.31"]
+
+UNDERLYINGS = ["SPX Index", "SX5E Index", "NKY Index", "UKX Index"]
+
+
+def response_time(rng):
+    """
+    Draw a response time in milliseconds: log-normal around 120ms with a slow tail.
+    """
+    latency = rng.lognormvariate(math.log(120), 0.6)
+    if rng.random() < 0.01:
+        latency *= 10
+    return latency
+
+
+def generate_api_calls(rows, days=90, end=None, seed=0):
+    """
+    Generate synthetic APICall records.
+
+    Parameters:
+        rows (int): The number of records, e.g. from 1K to 10M.
+        days (int): The number of days the timestamps are spread over.
+        end (datetime, optional): The most recent timestamp, now if omitted.
+        seed (int): The seed of the random generator, for reproducible runs.
+
+    Yields:
+        dict: The column values of one record.
+    """
+    rng = random.Random(seed)
+    end = end or dt.utcnow()
+    first_day = (end - timedelta(days=days)).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+    endpoints, methods, endpoint_weights = zip(*ENDPOINTS)
+    status_codes, status_weights = zip(*STATUS_CODES)
+
+    # Cumulative weights spare a pass over the weights on every draw
+    user_weights = list(accumulate(USER_WEIGHTS))
+    endpoint_weights = list(accumulate(endpoint_weights))
+    status_weights = list(accumulate(status_weights))
+    hour_weights = list(accumulate(HOUR_WEIGHTS))
+
+    for _ in range(rows):
+        username = rng.choices(USERS, cum_weights=user_weights)[0]
+        index = rng.choices(range(len(endpoints)), cum_weights=endpoint_weights)[0]
+        status_code = rng.choices(status_codes, cum_weights=status_weights)[0]
+
+        timestamp = first_day + timedelta(
+            days=rng.randrange(days + 1),
+            hours=rng.choices(range(24), cum_weights=hour_weights)[0],
+            seconds=rng.randrange(3600),
+        )
+        timestamp = min(timestamp, end)
+
+        grid_rows = rng.choice([1, 5, 20, 100])
+        parameters = {
+            "parameters": json.dumps([["Underlying", "Maturity", "Currency"]]),
+            "values": json.dumps(
+                [[rng.choice(UNDERLYINGS), "2y", "USD"] for _ in range(grid_rows)]
+            ),
+        }
+
+        yield {
+            "timestamp": timestamp,
+            "machine": f"{username.upper()}-PC",
+            "username": username,
+            "client_ip": f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}",
+            "endpoint": endpoints[index],
+            "status_code": status_code,
+            "parameters": json.dumps(parameters),
+            "response_time": response_time(rng),
+            "method": methods[index],
+            "response_body": None,
+            "error_message": "Internal Server Error" if status_code == 500 else None,
+            "user_agent": rng.choice(USER_AGENTS),
+            "referrer": "Unknown",
+        }
+
+
+def populate(model, rows, batch_size=BATCH_SIZE, **kwargs):
+    """
+    Insert synthetic records in batches, within an app context.
+
+    Parameters:
+        model (db.Model): The APICall model.
+        rows (int): The number of records to insert.
+        batch_size (int): The number of records per insert.
+        **kwargs: Passed to `generate_api_calls`.
+    """
+    from database.helpers import bulk_insert
+
+    batch = []
+    for record in generate_api_calls(rows, **kwargs):
+        batch.append(record)
+        if len(batch) == batch_size:
+            bulk_insert(model, batch)
+            batch = []
+
+    if batch:
+        bulk_insert(model, batch)
@@ -0,0 +1,178 @@
+"""
+In-process load driver for POST /api/air over grid sizes, orientations, request
+content types, response formats and concurrency levels.
+"""
+import json
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import serialization
+
+from .measure import peak_traced_mb, summarize, timed
+
+GRID_SIZES = (10, 100, 1_000, 10_000)
+ORIENTATIONS = ("rows", "columns")
+CONTENT_TYPES = ("form", "json", "msgpack")
+FORMATS = serialization.RESPONSE_FORMATS
+CONCURRENCY = (1, 4, 16)
+REQUESTS_PER_WORKER = 10
+
+PARAMETERS = ["Underlying", "Maturity", "Currency", "Strike", "Barrier", "Notional"]
+
+logger = logging.getLogger(__name__)
+
+
+def make_grid(rows, orientation):
+    """
+    Build the parameters and values of a grid of `rows` pricings.
+
+    Parameters:
+        rows (int): The number of pricings.
+        orientation (str): "rows" with one pricing per row, "columns" with one per column.
+
+    Returns:
+        tuple: The parameters and values, as nested arrays.
+    """
+    parameters = [PARAMETERS]
+    values = [["SPX Index", "2y", "USD", 100 + i % 20, 60, 1_000_000] for i in range(rows)]
+
+    if orientation == "columns":
+        parameters = [list(column) for column in zip(*parameters)]
+        values = [list(column) for column in zip(*values)]
+
+    return parameters, values
+
+
+def make_request(rows, orientation, content_type, response_format):
+    """
+    Build the keyword arguments of the test client for one /api/air request.
+
+    The "form" content type mirrors the Excel add-in, with one JSON string per
+    field. "json" and "msgpack" send a native body holding nested arrays.
+
+    Returns:
+        dict: The arguments of `client.post`.
+    """
+    parameters, values = make_grid(rows, orientation)
+    headers = {"UserName": "benchmark", "Machine": "benchmark"}
+
+    # The columnar format is compressed when the client accepts it
+    if response_format == serialization.COLUMNAR_FORMAT:
+        headers["Accept-Encoding"] = "gzip"
+
+    if content_type == "form":
+        data = {
+            "parameters": json.dumps(parameters),
+            "values": json.dumps(values),
+            "format": response_format,
+        }
+        return {"data": data, "headers": headers}
+
+    body = {"parameters": parameters, "values": values, "format": response_format}
+
+    if content_type == "msgpack":
+        data = serialization.msgpack.packb(body, use_bin_type=True)
+        mimetype = serialization.MSGPACK_MIMETYPES[0]
+    else:
+        data = json.dumps(body)
+        mimetype = serialization.JSON_MIMETYPE
+
+    return {"data": data, "content_type": mimetype, "headers": headers}
+
+
+def run_scenario(server, scenario, requests_per_worker):
+    """
+    Send `requests_per_worker` requests from each of the concurrent clients.
+
+    Parameters:
+        server (flask.Flask): The app under test.
+        scenario (dict): The rows, orientation, content_type, format and concurrency.
+        requests_per_worker (int): The number of requests sent by each client.
+
+    Returns:
+        dict: The result of the scenario.
+    """
+    kwargs = make_request(
+        scenario["rows"],
+        scenario["orientation"],
+        scenario["content_type"],
+        scenario["format"],
+    )
+    concurrency = scenario["concurrency"]
+
+    def post(client):
+        # Read the whole body, so that streamed responses are timed to their end
+        response = client.post("/api/air", **kwargs)
+        response.get_data()
+        response.close()
+        return response
+
+    def worker(count):
+        client = server.test_client()
+        timings = []
+        for _ in range(count):
+            response, elapsed = timed(post, client)
+            if response.status_code != 200:
+                raise RuntimeError(f"/api/air returned {response.status_code}")
+            timings.append(elapsed)
+        return timings
+
+    def send(count):
+        # Each of the concurrent clients sends `count` requests
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            return [
+                elapsed
+                for worker_timings in executor.map(worker, [count] * concurrency)
+                for elapsed in worker_timings
+            ]
+
+    start = time.perf_counter()
+    timings = send(requests_per_worker)
+    wall_time = time.perf_counter() - start
+
+    # One more, untimed, round of concurrent requests to measure their memory
+    peak_mb = peak_traced_mb(send, 1)
+
+    return summarize("api", scenario, timings, wall_time, peak_mb)
+
+
+def run(
+    server,
+    grid_sizes=GRID_SIZES,
+    orientations=ORIENTATIONS,
+    content_types=CONTENT_TYPES,
+    formats=FORMATS,
+    concurrency=CONCURRENCY,
+    requests_per_worker=REQUESTS_PER_WORKER,
+):
+    """
+    Run the whole matrix of /api/air scenarios, smallest grids first.
+
+    MessagePack scenarios are skipped when msgpack is not installed.
+
+    Returns:
+        list of dict: One result per scenario.
+    """
+    if "msgpack" in content_types and serialization.msgpack is None:
+        logger.warning("msgpack is not installed, skipping the MessagePack scenarios")
+        content_types = [ct for ct in content_types if ct != "msgpack"]
+
+    return [
+        run_scenario(
+            server,
+            {
+                "rows": rows,
+                "orientation": orientation,
+                "content_type": content_type,
+                "format": response_format,
+                "concurrency": workers,
+            },
+            requests_per_worker,
+        )
+        for rows in sorted(grid_sizes)
+        for orientation in orientations
+        for content_type in content_types
+        for response_format in formats
+        for workers in concurrency
+    ]
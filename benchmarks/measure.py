@@ -0,0 +1,170 @@
+import sys
+import json
+import time
+import platform
+import subprocess
+import tracemalloc
+from datetime import datetime as dt
+
+
+def percentile(values, q):
+    """
+    Return the q-th percentile of a list of values, with linear interpolation.
+
+    Parameters:
+        values (list of float): The measured values.
+        q (float): The percentile, between 0 and 100.
+
+    Returns:
+        float: The percentile, or None for an empty list.
+    """
+    if not values:
+        return None
+
+    values = sorted(values)
+    rank = (len(values) - 1) * q / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (rank - lower)
+
+
+def peak_traced_mb(func, *args, **kwargs):
+    """
+    Call a function once and return the peak memory it allocated, in megabytes.
+
+    Allocations are traced with tracemalloc (which also sees numpy and pandas
+    buffers), so the result belongs to this call only and not to whatever ran
+    before in the process. This is not the RSS: memory allocated outside the
+    Python allocators, e.g. SQLite's page cache, is left out. Tracing slows the
+    call down: keep it out of timings.
+    """
+    tracemalloc.start()
+    try:
+        func(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024 / 1024
+
+
+def timed(func, *args, **kwargs):
+    """
+    Call a function and return its result with the elapsed time in milliseconds.
+    """
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def summarize(suite, scenario, timings_ms, wall_time_s, peak_mb):
+    """
+    Build the result of a scenario from its per-call timings.
+
+    Parameters:
+        suite (str): The benchmark suite, e.g. "api" or "stats".
+        scenario (dict): The parameters identifying the scenario.
+        timings_ms (list of float): The duration of every call in milliseconds.
+        wall_time_s (float): The wall time of the whole scenario in seconds.
+        peak_mb (float): The peak traced memory of the scenario, see `peak_traced_mb`.
+
+    Returns:
+        dict: The machine-readable result.
+    """
+    return {
+        "suite": suite,
+        "scenario": scenario,
+        "calls": len(timings_ms),
+        "p50_ms": percentile(timings_ms, 50),
+        "p95_ms": percentile(timings_ms, 95),
+        "p99_ms": percentile(timings_ms, 99),
+        "throughput_per_s": len(timings_ms) / wall_time_s if wall_time_s else None,
+        "peak_traced_mb": peak_mb,
+    }
+
+
+def scenario_key(result):
+    """
+    Return a hashable key identifying the scenario of a result across runs.
+    """
+    return (result["suite"],) + tuple(sorted(result["scenario"].items()))
+
+
+def git_revision():
+    """
+    Return the current git commit of the repository, or None outside of git.
+    """
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(results, path=None):
+    """
+    Write the results of a run as JSON, with the details of the environment.
+
+    Parameters:
+        results (list of dict): The scenario results.
+        path (str, optional): The output file, stdout if omitted.
+    """
+    report = {
+        "meta": {
+            "timestamp": dt.now().isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+    if path:
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+def load_results(path):
+    """
+    Load the results written by `write_results`.
+    """
+    with open(path) as f:
+        return json.load(f)["results"]
+
+
+def compare_results(baseline, current, threshold=10.0):
+    """
+    Compare two runs scenario by scenario.
+
+    Parameters:
+        baseline (list of dict): The results of the reference run.
+        current (list of dict): The results of the run to check.
+        threshold (float): The p95 increase in percent reported as a regression.
+
+    Returns:
+        list of dict: One comparison per scenario present in both runs.
+    """
+    baseline = {scenario_key(result): result for result in baseline}
+    comparisons = []
+
+    for result in current:
+        reference = baseline.get(scenario_key(result))
+        if reference is None or not reference["p95_ms"]:
+            continue
+
+        change = (result["p95_ms"] - reference["p95_ms"]) / reference["p95_ms"] * 100
+        comparisons.append(
+            {
+                "suite": result["suite"],
+                "scenario": result["scenario"],
+                "baseline_p95_ms": reference["p95_ms"],
+                "current_p95_ms": result["p95_ms"],
+                "p95_change_pct": change,
+                "regression": change > threshold,
+            }
+        )
+
+    return comparisons
@@ -0,0 +1,112 @@
+"""
+Per-request parse/serialize cost of /api/air for large grids.
+
+Compares the form-encoded path of the Excel add-in (one JSON string per field,
+args re-serialized for the audit record, response encoded by the standard
+library) with the native JSON body path (one fast decode, fast encode).
+
+Runs as the "parsing" suite of `python -m benchmarks run`.
+"""
+import json
+import random
+import time
+from uuid import uuid4
+from datetime import datetime as dt
+
+import serialization
+from api import clean_json_values
+
+from .measure import peak_traced_mb, summarize, timed
+
+GRID_SIZES = (100, 1_000, 10_000, 50_000)
+PARAMETERS = ["Underlying", "Maturity", "Currency", "Strike", "Barrier", "Notional"]
+REPEAT = 5
+
+
+def make_grid(rows):
+    """Build a pricing grid with one header row and `rows` rows of values."""
+    parameters = [PARAMETERS]
+    values = [
+        [
+            random.choice(["SPX Index", "SX5E Index", "NKY Index"]),
+            random.choice(["1y", "2y", "5y"]),
+            random.choice(["USD", "EUR", "JPY"]),
+            round(random.uniform(80, 120), 2),
+            round(random.uniform(50, 80), 2),
+            1_000_000,
+        ]
+        for _ in range(rows)
+    ]
+    return parameters, values
+
+
+def make_results(rows):
+    """Build the `data` returned for a grid of `rows` rows."""
+    return [
+        [
+            {"Value": f"AIR - {uuid4()}", "Type": "string"},
+            {"Value": 1 + random.random(), "Type": "float"},
+            {"Value": dt.today().strftime("%Y-%m-%d"), "Type": "date"},
+        ]
+        for _ in range(rows)
+    ]
+
+
+def form_roundtrip(form, results):
+    """Decode the form fields separately with the standard library, as the add-in path does."""
+    clean_json_values(form, "parameters")
+    clean_json_values(form, "values")
+    json.dumps(form)
+    return json.dumps({"data": results}).encode("utf-8")
+
+
+def native_roundtrip(body, results):
+    """Decode the body once, re-serialize args and encode the response with the fast path."""
+    args = serialization.loads(body)
+    clean_json_values(args, "parameters")
+    clean_json_values(args, "values")
+    serialization.dumps_text(args)
+    return serialization.dumps({"data": results})
+
+
+def time_roundtrip(path, rows, func, *args):
+    """
+    Call a round trip `REPEAT` times and summarize its timings.
+
+    Returns:
+        dict: The result of the scenario.
+    """
+    timings = []
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        _, elapsed = timed(func, *args)
+        timings.append(elapsed)
+    wall_time = time.perf_counter() - start
+
+    # One more, untimed, call to measure the memory of the round trip alone
+    peak_mb = peak_traced_mb(func, *args)
+
+    scenario = {"path": path, "rows": rows}
+    return summarize("parsing", scenario, timings, wall_time, peak_mb)
+
+
+def run(grid_sizes=GRID_SIZES):
+    """
+    Time the form and native round trips for each grid size, smallest first.
+
+    Returns:
+        list of dict: One result per path and grid size.
+    """
+    results = []
+
+    for rows in sorted(grid_sizes):
+        parameters, values = make_grid(rows)
+        data = make_results(rows)
+
+        form = {"parameters": json.dumps(parameters), "values": json.dumps(values)}
+        body = json.dumps({"parameters": parameters, "values": values}).encode("utf-8")
+
+        results.append(time_roundtrip("form", rows, form_roundtrip, form, data))
+        results.append(time_roundtrip("native", rows, native_roundtrip, body, data))
+
+    return results
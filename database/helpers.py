@@ -1,6 +1,15 @@
 from flask import jsonify
-from sqlalchemy import or_
+import math
+from sqlalchemy import func, or_, select
 from .database import db
+from .partitions import (
+    is_partitioned,
+    insert_record,
+    insert_records,
+    partition_tables,
+    select_partitions,
+    drop_partitions,
+)
 import logging
 
 
@@ -9,16 +18,35 @@ logger = logging.getLogger(__name__)
 
 def add_record(model, **kwargs):
     try:
+        if is_partitioned(model):
+            record = insert_record(model, **kwargs)
+            db.session.commit()
+            return record
+
         with db.session.begin_nested():
             record = model(**kwargs)
             db.session.add(record)
         return record.to_dict()
     except Exception as e:
+        # A failed write must not keep the database locked
+        db.session.rollback()
         logger.error(f"Error adding record: {str(e)}")
 
 
 def update_record(model, record_id, **updates):
-    record = model.query.get(record_id)
+    if is_partitioned(model):
+        check_partition_unchanged(model, updates)
+        # Update the record in whichever table holds its id
+        updated = sum(
+            db.session.execute(
+                table.update().where(table.c.id == record_id).values(**updates)
+            ).rowcount
+            for table in partition_tables(model)
+        )
+        db.session.commit()
+        return find_record_by_id(model, record_id) if updated else None
+
+    record = model.query.filter_by(id=record_id).first()
     if record:
         for key, value in updates.items():
             setattr(record, key, value)
@@ -28,11 +56,33 @@ def update_record(model, record_id, **updates):
 
 
 def find_record_by_id(model, record_id):
-    record = model.query.get(record_id)
+    if is_partitioned(model):
+        record = db.session.execute(filter_partitions(model, id=record_id)).first()
+        return dict(record) if record else None
+
+    record = model.query.filter_by(id=record_id).first()
     return record.to_dict() if record else None
 
 
 def find_records_paginated(model, page, per_page, **filters):
+    if is_partitioned(model):
+        records = filter_partitions(model, **filters).alias()
+        total = db.session.execute(
+            select([func.count()]).select_from(records)
+        ).scalar()
+        items = db.session.execute(
+            select([records])
+            .order_by(records.c.id)
+            .limit(per_page)
+            .offset((page - 1) * per_page)
+        )
+        return {
+            "items": [dict(item) for item in items],
+            "total": total,
+            "pages": math.ceil(total / per_page) if per_page else 0,
+            "current_page": page,
+        }
+
     query = model.query
     for attr, value in filters.items():
         query = query.filter(getattr(model, attr) == value)
@@ -46,7 +96,15 @@ def find_records_paginated(model, page, per_page, **filters):
 
 
 def delete_record_by_id(model, record_id):
-    record = model.query.get(record_id)
+    if is_partitioned(model):
+        deleted = sum(
+            db.session.execute(table.delete().where(table.c.id == record_id)).rowcount
+            for table in partition_tables(model)
+        )
+        db.session.commit()
+        return {"status": "success"} if deleted else {"status": "record not found"}
+
+    record = model.query.filter_by(id=record_id).first()
     if record:
         db.session.delete(record)
         db.session.commit()
@@ -55,43 +113,89 @@ def delete_record_by_id(model, record_id):
 
 
 def count_records_by_attribute(model, **attributes):
+    if is_partitioned(model):
+        records = filter_partitions(model, **attributes).alias()
+        return db.session.execute(
+            select([func.count()]).select_from(records)
+        ).scalar()
+
     count = model.query.filter_by(**attributes).count()
     return count
 
 
 def search_records(model, search_term, fields):
+    if is_partitioned(model):
+        records = filter_partitions(model).alias()
+        query = select([records]).where(
+            or_(*[records.c[field].ilike(f"%{search_term}%") for field in fields])
+        )
+        return [dict(result) for result in db.session.execute(query)]
+
     search_query = " ".join(f"{field}.ilike('%{search_term}%')" for field in fields)
     results = model.query.filter(db.text(search_query)).all()
     return [result.to_dict() for result in results]
 
 
 def bulk_insert(model, list_of_dicts):
-    db.session.bulk_insert_mappings(model, list_of_dicts)
+    if is_partitioned(model):
+        insert_records(model, list_of_dicts)
+    else:
+        db.session.bulk_insert_mappings(model, list_of_dicts)
     db.session.commit()
 
 
 def bulk_update(model, updates):  # updates should be a list of dictionaries
-    db.session.bulk_update_mappings(model, updates)
+    if is_partitioned(model):
+        for update in updates:
+            check_partition_unchanged(model, update)
+        tables = partition_tables(model)
+        for update in updates:
+            values = {key: value for key, value in update.items() if key != "id"}
+            for table in tables:
+                db.session.execute(
+                    table.update().where(table.c.id == update["id"]).values(**values)
+                )
+    else:
+        db.session.bulk_update_mappings(model, updates)
     db.session.commit()
 
 
 def get_distinct_attribute_values(model, attribute):
+    if is_partitioned(model):
+        records = filter_partitions(model).alias()
+        distinct_values = db.session.execute(
+            select([records.c[attribute]]).distinct()
+        ).fetchall()
+        return [value[0] for value in distinct_values if value[0] is not None]
+
     distinct_values = db.session.query(getattr(model, attribute)).distinct().all()
     return [value[0] for value in distinct_values if value[0] is not None]
 
 
-def get_records_as_json(model, **filters):
+def get_records_as_json(model, start=None, end=None, **filters):
     """
     Query records from the given SQLAlchemy model table, apply filters, and return as JSON.
 
     Args:
     model (db.Model): The SQLAlchemy model class to query.
+    start (datetime, optional): For partitioned models, the inclusive lower bound of the timestamps.
+    end (datetime, optional): For partitioned models, the exclusive upper bound of the timestamps.
     **filters: Optional keyword arguments that are used to filter the query results.
 
     Returns:
     str: A JSON string of the queried records.
     """
     try:
+        if is_partitioned(model):
+            # Only read the partitions overlapping the timestamp range
+            records_list = [
+                dict(record)
+                for record in db.session.execute(
+                    filter_partitions(model, start, end, **filters)
+                )
+            ]
+            return jsonify(records_list)
+
         query = model.query
         # Apply filters if provided
         for attr, value in filters.items():
@@ -116,6 +220,81 @@ def get_records_as_json(model, **filters):
         return jsonify({"status": "error", "message": str(e)})
 
 
+def filter_partitions(model, start=None, end=None, **filters):
+    """
+    Build a query over the partitions of a model matching a timestamp range and filters.
+
+    Args:
+    model (db.Model): The partitioned SQLAlchemy model class.
+    start (datetime, optional): The inclusive lower bound of the timestamps.
+    end (datetime, optional): The exclusive upper bound of the timestamps.
+    **filters: Optional keyword arguments, with the same semantics as in get_records_as_json.
+
+    Returns:
+    Select: The query returning the matching records.
+    """
+    source = select_partitions(model, start, end).alias()
+    query = select([source])
+    for attr, value in filters.items():
+        if isinstance(value, list):
+            query = query.where(or_(*[source.c[attr] == v for v in value]))
+        else:
+            query = query.where(source.c[attr] == value)
+    return query
+
+
+def check_partition_unchanged(model, updates):
+    """
+    Reject updates of the partition column, which would leave records in the wrong partition.
+
+    Args:
+    model (db.Model): The partitioned SQLAlchemy model class.
+    updates (dict): The column values to update.
+
+    Raises:
+    ValueError: If the updates change the partition column.
+    """
+    if model.__partition_by__ in updates:
+        raise ValueError(
+            f"The {model.__partition_by__} of a partitioned record cannot be updated"
+        )
+
+
+def delete_records_before(model, cutoff):
+    """
+    Delete the records older than a cutoff.
+
+    Whole partitions are dropped. Only the records of the partition holding the
+    cutoff, and on SQLite those stored in the parent table before partitioning,
+    are deleted row by row.
+
+    Args:
+    model (db.Model): The partitioned SQLAlchemy model class.
+    cutoff (datetime): Records with an earlier timestamp are deleted.
+
+    Returns:
+    dict: A dictionary with the status of the deletion, the number of rows deleted and the dropped partitions or an error message.
+    """
+    try:
+        partitions_dropped = drop_partitions(model, before=cutoff)
+
+        # The remaining tables before the cutoff are the parent and at most one partition
+        column = model.__partition_by__
+        num_rows_deleted = sum(
+            db.session.execute(table.delete().where(table.c[column] < cutoff)).rowcount
+            for table in partition_tables(model, end=cutoff)
+        )
+        db.session.commit()
+        return {
+            "status": "success",
+            "rows_deleted": num_rows_deleted,
+            "partitions_dropped": partitions_dropped,
+        }
+    except Exception as e:
+        db.session.rollback()
+        return {"status": "error", "message": str(e)}
+
+
 def delete_all_records(model):
     """
     Delete all records from the given SQLAlchemy model table.
@@ -127,11 +306,18 @@ def delete_all_records(model):
     dict: A dictionary with the status of the deletion and number of rows deleted or an error message.
     """
     try:
+        # Drop the partitions of partitioned models instead of deleting their rows
+        partitions_dropped = drop_partitions(model) if is_partitioned(model) else []
+
         # Delete all records from the table
         num_rows_deleted = db.session.query(model).delete()
         # Commit the changes to the database
         db.session.commit()
-        return {"status": "success", "rows_deleted": num_rows_deleted}
+        return {
+            "status": "success",
+            "rows_deleted": num_rows_deleted,
+            "partitions_dropped": partitions_dropped,
+        }
     except Exception as e:
         # Rollback in case of any error
         db.session.rollback()
@@ -3,8 +3,17 @@ from database.database import db
 
 
 class APICall(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    timestamp = db.Column(db.DateTime, default=db.func.current_timestamp())
+    # Stored in day or month partitions of the timestamp (see database/partitions.py).
+    # PostgreSQL requires the partition key in the primary key of a partitioned table.
+    # SQLite cannot autoincrement a composite key: its partition tables take their ids
+    # from a shared counter, and the sequence only applies to PostgreSQL.
+    __partition_by__ = "timestamp"
+    __table_args__ = {"postgresql_partition_by": "RANGE (timestamp)"}
+
+    id = db.Column(db.Integer, db.Sequence("api_call_id_seq"), primary_key=True)
+    timestamp = db.Column(
+        db.DateTime, primary_key=True, default=db.func.current_timestamp()
+    )
     machine = db.Column(db.String(128))
     username = db.Column(db.String(128))
     client_ip = db.Column(db.String(128))
@@ -0,0 +1,574 @@
+import re
+import logging
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import (
+    Column,
+    Integer,
+    MetaData,
+    Table,
+    exists,
+    inspect,
+    literal,
+    select,
+    text,
+    union_all,
+)
+from sqlalchemy.exc import DatabaseError, OperationalError
+from .database import db
+
+
+logger = logging.getLogger(__name__)
+
+PERIODS = ("day", "month")
+
+# (database URL, name) of the partitions, and of the SQLite id counters, known to
+# exist, to avoid a DDL round trip per insert. Another worker may drop a partition:
+# writes recreate it.
+_known_partitions = set()
+
+# (database URL, name) of the PostgreSQL parent tables, and whether they are
+# actually partitioned (see partition_existing_table)
+_partitioned_parents = {}
+
+# SQLite partition tables, built from the columns of their parent model
+_sqlite_metadata = MetaData()
+
+
+def is_partitioned(model):
+    """
+    Tell whether the given model is stored in time partitions.
+
+    Args:
+    model (db.Model): The SQLAlchemy model class.
+
+    Returns:
+    bool: True if the model declares a `__partition_by__` column.
+    """
+    return getattr(model, "__partition_by__", None) is not None
+
+
+def get_period():
+    """
+    Return the partition period configured for the current app ("day" or "month").
+    """
+    period = current_app.config.get("APICALL_PARTITION_PERIOD", "month")
+    if period not in PERIODS:
+        raise ValueError(f"Unsupported partition period: {period}")
+    return period
+
+
+def period_bounds(timestamp, period):
+    """
+    Return the start (inclusive) and end (exclusive) of the period holding a timestamp.
+
+    Args:
+    timestamp (datetime): Any timestamp of the period.
+    period (str): "day" or "month".
+
+    Returns:
+    tuple: The (start, end) datetimes of the period.
+    """
+    if period == "day":
+        start = datetime(timestamp.year, timestamp.month, timestamp.day)
+        return start, start + timedelta(days=1)
+
+    start = datetime(timestamp.year, timestamp.month, 1)
+    if start.month == 12:
+        return start, datetime(start.year + 1, 1, 1)
+    return start, datetime(start.year, start.month + 1, 1)
+
+
+def partition_name(model, start, period):
+    """
+    Return the table name of the partition starting at `start`, e.g. api_call_2024_05.
+    """
+    suffix = start.strftime("%Y_%m_%d" if period == "day" else "%Y_%m")
+    return f"{model.__table__.name}_{suffix}"
+
+
+def list_partitions(model):
+    """
+    List the existing partitions of a model, oldest first.
+
+    Args:
+    model (db.Model): The partitioned SQLAlchemy model class.
+
+    Returns:
+    list: (name, start, end) tuples, one per partition table.
+    """
+    pattern = re.compile(
+        rf"^{re.escape(model.__table__.name)}_(\d{{4}})_(\d{{2}})(?:_(\d{{2}}))?$"
+    )
+    partitions = []
+
+    for name in inspect(db.session.connection()).get_table_names():
+        match = pattern.match(name)
+        if not match:
+            continue
+        year, month, day = match.groups()
+        timestamp = datetime(int(year), int(month), int(day or 1))
+        start, end = period_bounds(timestamp, "day" if day else "month")
+        partitions.append((name, start, end))
+
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def _partition_key(name):
+    return (str(db.engine.url), name)
+
+
+def _quote(name):
+    return db.engine.dialect.identifier_preparer.quote(name)
+
+
+def _sqlite_partition_table(model, name):
+    """
+    Return the SQLite table of a partition, with the columns of its parent model.
+
+    Ids are not generated by the partition but taken from the counter shared by
+    all the partitions of the model, see `reserve_ids`.
+    """
+    if name in _sqlite_metadata.tables:
+        return _sqlite_metadata.tables[name]
+
+    columns = [Column("id", Integer, primary_key=True)]
+    columns += [
+        Column(column.name, column.type)
+        for column in model.__table__.columns
+        if column.name != "id"
+    ]
+    return Table(name, _sqlite_metadata, *columns)
+
+
+def _sqlite_id_table(model):
+    """
+    Return the one-row SQLite table holding the last id given to a record of a model.
+    """
+    name = f"{model.__table__.name}_id_seq"
+    if name in _sqlite_metadata.tables:
+        return _sqlite_metadata.tables[name]
+
+    return Table(name, _sqlite_metadata, Column("value", Integer, nullable=False))
+
+
+def _create_sqlite_table(connection, table):
+    """
+    Create a SQLite table, unless it exists or another worker creates it meanwhile.
+    """
+    if db.engine.dialect.has_table(connection, table.name):
+        return
+
+    try:
+        with db.session.begin_nested():
+            table.create(connection)
+    except OperationalError as e:
+        if "already exists" not in str(e):
+            raise
+
+
+def _begin_write(connection):
+    """
+    On SQLite, start the transaction holding the write lock, unless one is open.
+
+    A transaction that reads before writing fails with "database is locked",
+    without waiting, as soon as another worker writes meanwhile.
+    """
+    if not connection.connection.in_transaction:
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def reserve_ids(model, count):
+    """
+    Reserve consecutive ids from the counter shared by all the SQLite tables of a model.
+
+    The counter is incremented in the transaction of the insert, which then holds
+    the database write lock until it commits: no two records get the same id,
+    whatever partition they are written to.
+
+    Args:
+    model (db.Model): The partitioned SQLAlchemy model class.
+    count (int): The number of ids to reserve.
+
+    Returns:
+    int: The first reserved id.
+    """
+    connection = db.session.connection()
+    table = _sqlite_id_table(model)
+    key = _partition_key(table.name)
+
+    if key not in _known_partitions:
+        _create_sqlite_table(connection, table)
+        # The counter starts after the highest id already stored
+        connection.execute(
+            table.insert().from_select(
+                ["value"],
+                select([literal(max_id(model, connection))]).where(
+                    ~exists(select([table.c.value]))
+                ),
+            )
+        )
+        _known_partitions.add(key)
+
+    connection.execute(table.update().values(value=table.c.value + count))
+    return connection.execute(select([table.c.value])).scalar() - count + 1
+
+
+def parent_is_partitioned(model):
+    """
+    Tell whether the PostgreSQL parent table of a model is actually partitioned.
+
+    db.create_all() leaves a table created before partitioning untouched. Until
+    it is converted with `partition_existing_table`, its records are written to
+    the parent table as before, and a warning is logged.
+    """
+    key = _partition_key(model.__table__.name)
+
+    if key not in _partitioned_parents:
+        partitioned = (
+            db.session.connection()
+            .execute(
+                text(
+                    "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table "
+                    "WHERE partrelid = to_regclass(:name))"
+                ),
+                {"name": model.__table__.name},
+            )
+            .scalar()
+        )
+        if not partitioned:
+            logger.warning(
+                f"Table {model.__table__.name} is not partitioned: records are written "
+                f"to it without partitions until it is converted with "
+                f"`flask --app index:server partition-tables`"
+            )
+        _partitioned_parents[key] = partitioned
+
+    return _partitioned_parents[key]
+
+
+def ensure_partition(model, timestamp):
+    """
+    Create the partition holding `timestamp` if it does not exist yet.
+
+    On PostgreSQL the partition is attached to the parent table with native
+    declarative partitioning, unless the parent table predates partitioning.
+    On SQLite it is a standalone table; a table created meanwhile by another
+    worker is used as is.
+
+    The DDL runs on the connection of the session, so that it never waits on
+    a write the session has not committed yet.
+
+    Args:
+    model (db.Model): The partitioned SQLAlchemy model class.
+    timestamp (datetime): A timestamp the partition must cover.
+
+    Returns:
+    str: The name of the partition.
+    """
+    period = get_period()
+    start, end = period_bounds(timestamp, period)
+    name = partition_name(model, start, period)
+
+    if _partition_key(name) in _known_partitions:
+        return name
+
+    connection = db.session.connection()
+
+    if db.engine.dialect.name == "postgresql":
+        if not parent_is_partitioned(model):
+            return name
+        connection.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {_quote(name)} "
+                f"PARTITION OF {_quote(model.__table__.name)} "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            )
+        )
+    else:
+        _create_sqlite_table(connection, _sqlite_partition_table(model, name))
+
+    logger.info(f"Partition {name} ready for {start:%Y-%m-%d} to {end:%Y-%m-%d}")
+    _known_partitions.add(_partition_key(name))
+
+    return name
+
+
+def max_id(model, connection):
+    """
+    Return the highest id stored in the parent table and all its partitions.
+    """
+    tables = [model.__table__] + [
+        _sqlite_partition_table(model, name) for name, _, _ in list_partitions(model)
+    ]
+    ids = [
+        connection.execute(select([db.func.max(table.c.id)])).scalar() or 0
+        for table in tables
+    ]
+    return max(ids)
+
+
+def write_partition(model, timestamp, records):
+    """
+    Insert records of the same period into the table holding their partition.
+
+    The partition is created first if needed. If the write fails while the
+    partition was only known from the cache, e.g. because another worker
+    dropped it, the partition is created again and the write retried once.
+
+    Args:
+    model (db.Model): The partitioned SQLAlchemy model class.
+    timestamp (datetime): A timestamp of the partition.
+    records (list of dict): The column values of the records.
+
+    Returns:
+    list: The ids of the inserted records, None for bulk inserts on PostgreSQL.
+    """
+
+    def run():
+        if db.engine.dialect.name != "postgresql":
+            _begin_write(db.session.connection())
+
+        # The partition is created in the same transaction as the write
+        with db.session.begin_nested():
+            # PostgreSQL routes rows written in the parent table to their partition
+            if db.engine.dialect.name == "postgresql":
+                rows = records
+                table = model.__table__
+                ensure_partition(model, timestamp)
+            else:
+                first_id = reserve_ids(model, len(records))
+                rows = [
+                    dict(record, id=first_id + offset)
+                    for offset, record in enumerate(records)
+                ]
+                table = _sqlite_partition_table(
+                    model, ensure_partition(model, timestamp)
+                )
+
+            if len(rows) == 1:
+                result = db.session.execute(table.insert().values(**rows[0]))
+                return [result.inserted_primary_key[0]]
+
+            db.session.execute(table.insert(), rows)
+            return [row.get("id") for row in rows]
+
+    period = get_period()
+    start, _ = period_bounds(timestamp, period)
+    key = _partition_key(partition_name(model, start, period))
+    cached = key in _known_partitions
+
+    try:
+        return run()
+    except DatabaseError:
+        if not cached:
+            raise
+        logger.warning(f"Partition {key[1]} is missing, creating it again")
+        _known_partitions.discard(key)
+        return run()
+
+
+def insert_record(model, **kwargs):
+    """
+    Insert a record into the partition matching its timestamp.
+
+    The timestamp is set here when missing, so that the partition is known
+    before the row is written.
+
+    Args:
+    model (db.Model): The partitioned SQLAlchemy model class.
+    **kwargs: The column values of the record.
+
+    Returns:
+    dict: The inserted record.
+    """
+    column = model.__partition_by__
+    kwargs.setdefault(column, datetime.utcnow())
+
+    (record_id,) = write_partition(model, kwargs[column], [kwargs])
+
+    record = {c.name: kwargs.get(c.name) for c in model.__table__.columns}
+    record["id"] = record_id
+    return record
+
+
+def insert_records(model, records):
+    """
+    Insert many records, each batch going straight to the partition matching its timestamps.
+
+    Args:
+    model (db.Model): The partitioned SQLAlchemy model class.
+    records (list of dict): The column values of the records.
+    """
+    column = model.__partition_by__
+    period = get_period()
+    batches = {}
+
+    for record in records:
+        record.setdefault(column, datetime.utcnow())
+        start, _ = period_bounds(record[column], period)
+        batches.setdefault(start, []).append(record)
+
+    for start, batch in batches.items():
+        write_partition(model, start, batch)
+
+
+def partition_tables(model, start=None, end=None):
+    """
+    Return the tables holding the records of a model between two timestamps.
+
+    On PostgreSQL this is the parent table, which routes reads and writes to its
+    partitions. On SQLite these are the parent table, holding the records written
+    before partitioning, and the partitions overlapping the range.
+
+    Args:
+    model (db.Model): The partitioned SQLAlchemy model class.
+    start (datetime, optional): The inclusive lower bound of the range.
+    end (datetime, optional): The exclusive upper bound of the range.
+
+    Returns:
+    list: The Table objects to read or write.
+    """
+    if db.engine.dialect.name == "postgresql":
+        return [model.__table__]
+
+    return [model.__table__] + [
+        _sqlite_partition_table(model, name)
+        for name, partition_start, partition_end in list_partitions(model)
+        if (end is None or partition_start < end)
+        and (start is None or partition_end > start)
+    ]
+
+
+def select_partitions(model, start=None, end=None):
+    """
+    Build a query over the records of a model between two timestamps.
+
+    On PostgreSQL the parent table is filtered on the partition column and the
+    planner prunes the partitions outside the range. On SQLite only the tables
+    of the matching periods are read, plus the parent table holding the records
+    written before partitioning.
+
+    Args:
+    model (db.Model): The partitioned SQLAlchemy model class.
+    start (datetime, optional): The inclusive lower bound of the range.
+    end (datetime, optional): The exclusive upper bound of the range.
+
+    Returns:
+    Select: A query returning the columns of the model.
+    """
+
+    def select_range(table):
+        query = select([table.c[c.name] for c in model.__table__.columns])
+        column = table.c[model.__partition_by__]
+        if start is not None:
+            query = query.where(column >= start)
+        if end is not None:
+            query = query.where(column < end)
+        return query
+
+    queries = [select_range(table) for table in partition_tables(model, start, end)]
+
+    return queries[0] if len(queries) == 1 else union_all(*queries)
+
+
+def drop_partitions(model, before=None):
+    """
+    Drop the partitions whose whole period ends before a cutoff.
+
+    The tables are dropped on the connection of the session; the caller commits.
+
+    Args:
+    model (db.Model): The partitioned SQLAlchemy model class.
+    before (datetime, optional): The cutoff; all partitions are dropped if omitted.
+
+    Returns:
+    list: The names of the dropped partitions.
+    """
+    dropped = []
+
+    connection = db.session.connection()
+    if db.engine.dialect.name != "postgresql":
+        _begin_write(connection)
+
+    for name, _, end in list_partitions(model):
+        if before is not None and end > before:
+            continue
+        connection.execute(text(f"DROP TABLE IF EXISTS {_quote(name)}"))
+        _known_partitions.discard(_partition_key(name))
+        dropped.append(name)
+
+    logger.info(f"Dropped partitions: {dropped}")
+
+    return dropped
+
+
+def partition_existing_table(model):
+    """
+    Convert the unpartitioned PostgreSQL table of a model, created before
+    partitioning, to a partitioned table holding the same records.
+
+    The old table is renamed to <table>_unpartitioned and kept, so that it can be
+    checked before being dropped by hand. Its id sequence is handed over to the
+    new table. Records without a timestamp fit no partition and stay there.
+    The conversion runs on the connection of the session; the caller commits.
+    Run it while the app is stopped: running workers keep writing to the table
+    as if it were not partitioned.
+
+    Args:
+    model (db.Model): The partitioned SQLAlchemy model class.
+
+    Returns:
+    int: The number of records copied, 0 if the table was already partitioned.
+    """
+    if db.engine.dialect.name != "postgresql" or parent_is_partitioned(model):
+        return 0
+
+    table = model.__table__
+    old_name = f"{table.name}_unpartitioned"
+    sequence = f"{table.name}_id_seq"
+    column = f'"{model.__partition_by__}"'
+    connection = db.session.connection()
+
+    connection.execute(
+        text(f"ALTER TABLE {_quote(table.name)} RENAME TO {_quote(old_name)}")
+    )
+    connection.execute(
+        text(
+            f"ALTER TABLE {_quote(old_name)} RENAME CONSTRAINT "
+            f"{_quote(table.name + '_pkey')} TO {_quote(old_name + '_pkey')}"
+        )
+    )
+    # The sequence of the serial id must outlive the old table
+    connection.execute(text(f"ALTER SEQUENCE {_quote(sequence)} OWNED BY NONE"))
+    table.create(connection, checkfirst=True)
+    _partitioned_parents[_partition_key(table.name)] = True
+
+    unit = "day" if get_period() == "day" else "month"
+    starts = connection.execute(
+        text(
+            f"SELECT DISTINCT date_trunc('{unit}', {column}) FROM {_quote(old_name)} "
+            f"WHERE {column} IS NOT NULL"
+        )
+    )
+    for (start,) in starts.fetchall():
+        ensure_partition(model, start)
+
+    columns = ", ".join(_quote(c.name) for c in table.columns)
+    copied = connection.execute(
+        text(
+            f"INSERT INTO {_quote(table.name)} ({columns}) "
+            f"SELECT {columns} FROM {_quote(old_name)} WHERE {column} IS NOT NULL"
+        )
+    ).rowcount
+    connection.execute(
+        text(
+            f"SELECT setval('{sequence}', GREATEST("
+            f"(SELECT COALESCE(max(id), 1) FROM {_quote(old_name)}), "
+            f"(SELECT last_value FROM {_quote(sequence)})))"
+        )
+    )
+
+    logger.info(f"Copied {copied} records of {old_name} to the partitioned {table.name}")
+
+    return copied
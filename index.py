@@ -4,6 +4,8 @@ import dash_bootstrap_components as dbc
 from api import api
 from config import Config, setup_logging
 from database.database import db
+from database.models import APICall
+from database.partitions import partition_existing_table
 from pages import stats
 
 
@@ -22,6 +24,13 @@ def create_app():
     with flask_app.app_context():
         db.create_all()
 
+    @flask_app.cli.command("partition-tables")
+    def partition_tables():
+        """Convert the api_call table created before partitioning (PostgreSQL)."""
+        copied = partition_existing_table(APICall)
+        db.session.commit()
+        print(f"Copied {copied} records to the partitioned api_call table")
+
     return flask_app
 
 
@@ -3,9 +3,9 @@ from dash import dcc, html, dash_table, callback
 import dash_bootstrap_components as dbc
 from dash.exceptions import PreventUpdate
 from dash.dependencies import Input, Output, State
+from flask import current_app
 import pandas as pd
 from datetime import datetime, timedelta
-from index import app
 from database.models import APICall
 from database.helpers import get_records_as_json
 
@@ -15,6 +15,10 @@ def layout():
     return dbc.Container(
         [
             html.H1("API Call Statistics"),
+            html.P(
+                f"Last {current_app.config['STATS_WINDOW_DAYS']} days",
+                className="text-muted",
+            ),
             html.Hr(),
             dbc.Row(id="kpi-cards", className="mb-4"),  # Placeholder for KPI cards
             dbc.Row(
@@ -30,7 +34,9 @@ def layout():
 
 @callback(Output("stats-data", "data"), Input("url", "pathname"))
 def update_data(pathname):
-    return get_records_as_json(APICall).json
+    # Only read the partitions of the stats window (timestamps are stored in UTC)
+    start = datetime.utcnow() - timedelta(days=current_app.config["STATS_WINDOW_DAYS"])
+    return get_records_as_json(APICall, start=start).json
 
 
 @callback(
@@ -47,7 +53,7 @@ def update_kpi_cards(data):
 
         # KPIs Calculations
         unique_users = df["username"].nunique()
-        recent_calls = df[df["timestamp"] >= (datetime.now() - timedelta(hours=24))]
+        recent_calls = df[df["timestamp"] >= (datetime.utcnow() - timedelta(hours=24))]
         calls_last_24h = len(recent_calls)
         most_active_user = df["username"].mode()[0] if not df.empty else "None"
         error_calls = df[df["status_code"] >= 400]
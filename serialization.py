@@ -0,0 +1,252 @@
+import gzip
+import json
+import zlib
+from flask import Response
+
+# orjson and msgpack are optional: JSON falls back to the standard library and
+# MessagePack bodies are rejected when the package is not installed.
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+
+JSON_MIMETYPE = "application/json"
+MSGPACK_MIMETYPES = ("application/msgpack", "application/x-msgpack")
+NDJSON_MIMETYPE = "application/x-ndjson"
+NATIVE_MIMETYPES = (JSON_MIMETYPE,) + MSGPACK_MIMETYPES
+
+ROWS_FORMAT = "rows"
+COLUMNAR_FORMAT = "columnar"
+NDJSON_FORMAT = "ndjson"
+RESPONSE_FORMATS = (ROWS_FORMAT, COLUMNAR_FORMAT, NDJSON_FORMAT)
+
+# Content codings supported for compressed responses, and the size below which
+# compressing is not worth the CPU time
+CONTENT_ENCODINGS = ("gzip", "deflate")
+MIN_COMPRESS_SIZE = 1024
+
+
+class UnsupportedMediaType(ValueError):
+    """Raised when a request body or requested response format cannot be handled."""
+
+
+def loads(data):
+    """
+    Decode a JSON document using the fastest available decoder.
+
+    orjson rejects NaN, Infinity and integers wider than 64 bits, which the
+    standard library accepts: such documents fall back to `json.loads`.
+
+    Parameters:
+        data (str or bytes): The JSON document.
+
+    Returns:
+        The decoded Python object.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data)
+
+
+def dumps(obj) -> bytes:
+    """
+    Encode a Python object to JSON bytes using the fastest available encoder.
+
+    Integers wider than 64 bits, which orjson cannot encode, fall back to `json.dumps`.
+
+    Parameters:
+        obj: The object to encode.
+
+    Returns:
+        bytes: The UTF-8 encoded JSON document.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=str)
+        except orjson.JSONEncodeError:
+            pass
+    return json.dumps(obj, default=str).encode("utf-8")
+
+
+def dumps_text(obj) -> str:
+    """
+    Encode a Python object to a JSON string, e.g. for storing in a Text column.
+
+    Parameters:
+        obj: The object to encode.
+
+    Returns:
+        str: The JSON document.
+    """
+    return dumps(obj).decode("utf-8")
+
+
+def dumps_line(obj) -> bytes:
+    """
+    Encode a Python object as one newline-terminated NDJSON line.
+
+    Parameters:
+        obj: The object to encode.
+
+    Returns:
+        bytes: The JSON document followed by a newline.
+    """
+    return dumps(obj) + b"\n"
+
+
+def is_native_request(request) -> bool:
+    """
+    Tell whether the request carries a native JSON or MessagePack body
+    instead of the form-encoded fields sent by the Excel add-in.
+    """
+    return request.mimetype in NATIVE_MIMETYPES
+
+
+def decode_body(request) -> dict:
+    """
+    Decode the body of a native request in a single pass.
+
+    Parameters:
+        request (flask.Request): The incoming request.
+
+    Returns:
+        dict: The decoded body.
+
+    Raises:
+        UnsupportedMediaType: If the body is MessagePack and msgpack is not installed.
+        ValueError: If the body cannot be decoded or is not an object.
+    """
+    raw = request.get_data(cache=False)
+
+    if request.mimetype in MSGPACK_MIMETYPES:
+        if msgpack is None:
+            raise UnsupportedMediaType("MessagePack support is not installed")
+        body = msgpack.unpackb(raw, raw=False)
+    else:
+        body = loads(raw) if raw else {}
+
+    if not isinstance(body, dict):
+        raise ValueError("Request body must be an object")
+
+    return body
+
+
+def response_mimetype(request) -> str:
+    """
+    Pick the response content type of a native request.
+
+    The Accept header wins when it names a supported format, otherwise the
+    response mirrors the request content type.
+    """
+    # Accept values are sorted by quality, wildcards are ignored here
+    for mimetype, _ in request.accept_mimetypes:
+        if mimetype in MSGPACK_MIMETYPES and msgpack is None:
+            continue
+        if mimetype in NATIVE_MIMETYPES:
+            return mimetype
+    return request.mimetype if request.mimetype in NATIVE_MIMETYPES else JSON_MIMETYPE
+
+
+def to_columnar(data) -> dict:
+    """
+    Turn rows of `{"Value": ..., "Type": ...}` cells into column arrays.
+
+    Each column declares its type once. A column whose cells do not share the
+    same type gets the type "mixed" and a per-cell `Types` array. Short rows are
+    padded with null values.
+
+    Parameters:
+        data (list of list): The pricing results, one list of cells per row.
+
+    Returns:
+        dict: The columnar payload.
+    """
+    width = max((len(row) for row in data), default=0)
+    columns = []
+
+    for index in range(width):
+        cells = [row[index] if index < len(row) else {} for row in data]
+        values = [cell.get("Value") for cell in cells]
+        types = [cell.get("Type") for cell in cells]
+
+        # Padding cells carry no type and do not make a column mixed
+        declared = {cell_type for cell_type in types if cell_type is not None}
+        if len(declared) <= 1:
+            column_type = declared.pop() if declared else None
+            columns.append({"Type": column_type, "Values": values})
+        else:
+            columns.append({"Type": "mixed", "Types": types, "Values": values})
+
+    return {"format": COLUMNAR_FORMAT, "rows": len(data), "columns": columns}
+
+
+def content_encoding(request):
+    """
+    Pick the compression of the response from the Accept-Encoding header.
+
+    Returns:
+        str or None: "gzip", "deflate" or None when no supported coding is accepted.
+    """
+    # Accept-Encoding values are sorted by quality
+    for encoding, quality in request.accept_encodings:
+        if encoding in CONTENT_ENCODINGS and quality > 0:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding) -> bytes:
+    """
+    Compress a response body with the given content coding.
+
+    Parameters:
+        body (bytes): The encoded response.
+        encoding (str): "gzip" or "deflate".
+
+    Returns:
+        bytes: The compressed body.
+    """
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=6)
+    if encoding == "deflate":
+        return zlib.compress(body, 6)
+    raise ValueError(f"Unsupported content encoding: {encoding}")
+
+
+def encode_response(
+    payload, mimetype=JSON_MIMETYPE, status=200, encoding=None
+) -> Response:
+    """
+    Encode a payload with the fast path matching the given content type.
+
+    Parameters:
+        payload: The object to encode.
+        mimetype (str): One of the supported native content types.
+        status (int): The HTTP status code.
+        encoding (str, optional): The content coding used to compress the body.
+
+    Returns:
+        flask.Response: The encoded response.
+    """
+    if mimetype in MSGPACK_MIMETYPES:
+        if msgpack is None:
+            raise UnsupportedMediaType("MessagePack support is not installed")
+        body = msgpack.packb(payload, use_bin_type=True, default=str)
+    else:
+        body = dumps(payload)
+
+    headers = {}
+    if encoding and len(body) >= MIN_COMPRESS_SIZE:
+        body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+        headers["Vary"] = "Accept-Encoding"
+
+    return Response(body, status=status, mimetype=mimetype, headers=headers)
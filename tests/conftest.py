@@ -0,0 +1,26 @@
+import pytest
+from flask import Flask
+from api import api
+from config import Config
+from database.database import db
+
+
+@pytest.fixture
+def app(tmp_path):
+    """A Flask app bound to an empty SQLite database."""
+    flask_app = Flask(__name__)
+    flask_app.config.from_object(Config)
+    flask_app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'test.db'}"
+
+    db.init_app(flask_app)
+    api.init_app(flask_app)
+
+    with flask_app.app_context():
+        db.create_all()
+        yield flask_app
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,226 @@
+import gzip
+import json
+import zlib
+import pytest
+import api as api_module
+import serialization
+from database.helpers import count_records_by_attribute, find_record_by_id
+from database.models import APICall
+
+
+def post_form(client, values, **fields):
+    return client.post(
+        "/api/air",
+        data={"parameters": '[["Underlying", "Strike"]]', "values": values, **fields},
+    )
+
+
+def post_json(client, body, **headers):
+    return client.post(
+        "/api/air",
+        data=json.dumps(body),
+        content_type="application/json",
+        headers=headers,
+    )
+
+
+def test_form_accepts_nan_and_wide_integers(client):
+    response = post_form(
+        client, '[["SPX Index", NaN], ["SX5E Index", 123456789012345678901234567890]]'
+    )
+
+    assert response.status_code == 200
+    assert len(response.get_json()["data"]) == 2
+
+
+def test_json_body_with_nested_arrays(client):
+    response = post_json(
+        client,
+        {
+            "parameters": [["Underlying", "Strike"]],
+            "values": [["SPX Index", 100], ["SX5E Index", 90]],
+        },
+    )
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/json"
+    assert len(response.get_json()["data"]) == 2
+
+
+def test_json_body_accepts_nan(client):
+    response = client.post(
+        "/api/air",
+        data='{"parameters": [["Underlying", "Strike"]], "values": [["SPX Index", NaN]]}',
+        content_type="application/json",
+    )
+
+    assert response.status_code == 200
+
+
+def test_msgpack_body_without_msgpack_is_unsupported(client, monkeypatch):
+    monkeypatch.setattr(serialization, "msgpack", None)
+
+    response = client.post("/api/air", data=b"\x80", content_type="application/msgpack")
+
+    assert response.status_code == 415
+
+
+def test_msgpack_accept_without_msgpack_falls_back_to_json(client, monkeypatch):
+    monkeypatch.setattr(serialization, "msgpack", None)
+
+    response = post_json(
+        client,
+        {"parameters": [["Underlying"]], "values": [["SPX Index"]]},
+        Accept="application/msgpack",
+    )
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/json"
+
+
+@pytest.mark.parametrize("content_type", ["application/json", "application/msgpack"])
+def test_msgpack_response(client, content_type):
+    msgpack = pytest.importorskip("msgpack")
+    body = {
+        "parameters": [["Underlying", "Strike"]],
+        "values": [["SPX Index", 100], ["SX5E Index", 90]],
+    }
+    if content_type == "application/msgpack":
+        data = msgpack.packb(body)
+    else:
+        data = json.dumps(body)
+
+    response = client.post(
+        "/api/air",
+        data=data,
+        content_type=content_type,
+        headers={"Accept": "application/msgpack"},
+    )
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/msgpack"
+    assert len(msgpack.unpackb(response.get_data())["data"]) == 2
+
+
+def test_columnar_format(client):
+    response = post_form(
+        client, '[["SPX Index", 100], ["SX5E Index", 90]]', format="columnar"
+    )
+
+    body = response.get_json()
+    assert body["rows"] == 2
+    assert [column["Type"] for column in body["columns"]] == ["string", "float", "date"]
+
+
+def post_columnar(client, rows, **headers):
+    return client.post(
+        "/api/air",
+        data={
+            "parameters": '[["Underlying", "Strike"]]',
+            "values": json.dumps([["SPX Index", 100 + row] for row in range(rows)]),
+            "format": "columnar",
+        },
+        headers=headers,
+    )
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, encoding, decompress",
+    [
+        ("gzip", "gzip", gzip.decompress),
+        ("deflate", "deflate", zlib.decompress),
+        ("gzip;q=0.5, deflate", "deflate", zlib.decompress),
+    ],
+)
+def test_columnar_format_is_compressed(
+    client, monkeypatch, accept_encoding, encoding, decompress
+):
+    # Same results for both requests, so that their bodies can be compared
+    monkeypatch.setattr(
+        api_module,
+        "price_air",
+        lambda pricing: [
+            {"Value": pricing["Underlying"], "Type": "string"},
+            {"Value": pricing["Strike"] / 100, "Type": "float"},
+        ],
+    )
+
+    plain = post_columnar(client, 100)
+    compressed = post_columnar(client, 100, **{"Accept-Encoding": accept_encoding})
+
+    assert "Content-Encoding" not in plain.headers
+    assert len(plain.get_data()) >= serialization.MIN_COMPRESS_SIZE
+    assert compressed.headers["Content-Encoding"] == encoding
+    assert compressed.headers["Vary"] == "Accept-Encoding"
+    assert json.loads(decompress(compressed.get_data())) == plain.get_json()
+
+
+def test_small_columnar_response_is_not_compressed(client):
+    response = post_columnar(client, 1, **{"Accept-Encoding": "gzip"})
+
+    assert len(response.get_data()) < serialization.MIN_COMPRESS_SIZE
+    assert "Content-Encoding" not in response.headers
+    assert response.get_json()["rows"] == 1
+
+
+def test_refused_encoding_is_not_used(client):
+    response = post_columnar(client, 100, **{"Accept-Encoding": "gzip;q=0"})
+
+    assert "Content-Encoding" not in response.headers
+    assert response.get_json()["rows"] == 100
+
+
+def test_invalid_format_is_rejected_on_both_paths(client):
+    form = post_form(client, '[["SPX Index", 100]]', format="bogus")
+    native = post_json(
+        client,
+        {"parameters": [["Underlying"]], "values": [["SPX Index"]], "format": "bogus"},
+    )
+
+    assert form.status_code == 400
+    assert native.status_code == 400
+
+
+def ndjson_lines(response):
+    return [json.loads(line) for line in response.get_data().splitlines()]
+
+
+def test_ndjson_streams_rows_and_records_the_call(client):
+    response = post_form(
+        client, '[["SPX Index", 100], ["SX5E Index", 90]]', format="ndjson"
+    )
+    lines = ndjson_lines(response)
+    response.close()
+
+    assert response.mimetype == "application/x-ndjson"
+    assert [line["row"] for line in lines[:-1]] == [0, 1]
+    assert lines[-1] == {"done": True, "rows": 2, "errors": 0}
+    assert count_records_by_attribute(APICall, status_code=200) == 1
+
+
+def test_ndjson_reports_errors_before_streaming_inline(client):
+    response = client.post(
+        "/api/air",
+        data={"parameters": '[[""]]', "values": '[["SPX Index"]]', "format": "ndjson"},
+    )
+    lines = ndjson_lines(response)
+
+    assert response.mimetype == "application/x-ndjson"
+    assert lines[0]["data"][0]["Value"].startswith("AIR Error")
+    assert lines[-1] == {"done": True, "rows": 1, "errors": 1}
+
+
+def test_ndjson_records_a_call_closed_before_streaming(client):
+    response = client.post(
+        "/api/air",
+        data={
+            "parameters": '[["Underlying"]]',
+            "values": '[["SPX Index"]]',
+            "format": "ndjson",
+        },
+        buffered=False,
+    )
+    response.close()
+
+    record = find_record_by_id(APICall, 1)
+    assert record["error_message"] == "Stream interrupted after 0 rows"
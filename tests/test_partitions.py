@@ -0,0 +1,171 @@
+import pytest
+from datetime import datetime
+from sqlalchemy import inspect
+from database.database import db
+from database.helpers import (
+    add_record,
+    bulk_insert,
+    bulk_update,
+    count_records_by_attribute,
+    delete_record_by_id,
+    delete_records_before,
+    find_record_by_id,
+    find_records_paginated,
+    get_distinct_attribute_values,
+    get_records_as_json,
+    search_records,
+    update_record,
+)
+from database.models import APICall
+from database import partitions
+from database.partitions import list_partitions, select_partitions
+
+
+def test_create_schema_on_empty_sqlite(app):
+    assert "api_call" in inspect(db.engine).get_table_names()
+
+
+def test_helpers_read_sqlite_partitions(client):
+    for user in ("alice", "bob"):
+        response = client.post(
+            "/api/air",
+            data={"parameters": '[["Underlying"]]', "values": '[["SPX Index"]]'},
+            headers={"UserName": user, "Machine": "PC"},
+        )
+        assert response.status_code == 200
+
+    assert find_record_by_id(APICall, 1)["username"] == "alice"
+    assert sorted(get_distinct_attribute_values(APICall, "username")) == ["alice", "bob"]
+    assert count_records_by_attribute(APICall, username="bob") == 1
+    assert find_records_paginated(APICall, 1, 1)["total"] == 2
+    assert [r["username"] for r in search_records(APICall, "bo", ["username"])] == ["bob"]
+
+    assert update_record(APICall, 2, machine="LAPTOP")["machine"] == "LAPTOP"
+    assert delete_record_by_id(APICall, 2) == {"status": "success"}
+    assert find_record_by_id(APICall, 2) is None
+
+
+def test_add_record_recreates_dropped_partition(app):
+    add_record(APICall, username="alice")
+
+    # Another worker drops the partition behind the back of this one
+    for name, _, _ in list_partitions(APICall):
+        db.session.execute(f'DROP TABLE "{name}"')
+    db.session.commit()
+
+    assert add_record(APICall, username="bob")["username"] == "bob"
+    assert get_distinct_attribute_values(APICall, "username") == ["bob"]
+
+
+def test_bulk_insert_across_periods(app):
+    bulk_insert(
+        APICall,
+        [
+            {"timestamp": datetime(2024, 1, 15), "username": "alice"},
+            {"timestamp": datetime(2024, 2, 15), "username": "bob"},
+        ],
+    )
+    add_record(APICall, timestamp=datetime(2024, 3, 15), username="carol")
+
+    assert [name for name, _, _ in list_partitions(APICall)] == [
+        "api_call_2024_01",
+        "api_call_2024_02",
+        "api_call_2024_03",
+    ]
+
+    # Only the partitions overlapping the range are read
+    query = str(select_partitions(APICall, start=datetime(2024, 2, 1)))
+    assert "api_call_2024_01" not in query
+    assert "api_call_2024_02" in query
+
+    records = get_records_as_json(APICall, start=datetime(2024, 2, 1)).json
+    assert sorted(record["username"] for record in records) == ["bob", "carol"]
+
+
+def test_add_record_with_pending_write(app):
+    # A write the session has not committed yet must not lock the partition DDL
+    db.session.execute(APICall.__table__.update().values(username="nobody"))
+
+    assert add_record(APICall, timestamp=datetime(2024, 5, 1), username="alice")
+
+    db.session.commit()
+    db.session.remove()
+    assert find_record_by_id(APICall, 1)["username"] == "alice"
+
+
+def test_ids_unique_across_partitions(app):
+    # A record stored in the parent table before partitioning
+    db.session.execute(
+        APICall.__table__.insert().values(
+            id=10, timestamp=datetime(2023, 12, 1), username="legacy"
+        )
+    )
+
+    # Records written out of time order
+    first = add_record(APICall, username="alice")
+    bulk_insert(APICall, [{"timestamp": datetime(2024, 9, 1), "username": "bob"}])
+    last = add_record(APICall, username="carol")
+
+    ids = [record["id"] for record in get_records_as_json(APICall).json]
+    assert sorted(ids) == [10, 11, 12, 13]
+    assert (first["id"], last["id"]) == (11, 13)
+
+    assert find_record_by_id(APICall, 12)["username"] == "bob"
+    assert delete_record_by_id(APICall, 12) == {"status": "success"}
+    assert count_records_by_attribute(APICall) == 3
+
+
+def test_update_rejects_timestamp_change(app):
+    record = add_record(APICall, timestamp=datetime(2024, 1, 15), username="alice")
+
+    with pytest.raises(ValueError):
+        update_record(APICall, record["id"], timestamp=datetime(2024, 2, 15))
+    with pytest.raises(ValueError):
+        bulk_update(APICall, [{"id": record["id"], "timestamp": datetime(2024, 2, 15)}])
+
+
+def test_partition_created_by_another_worker(app, monkeypatch):
+    add_record(APICall, timestamp=datetime(2024, 1, 15), username="alice")
+
+    # Another worker creates the partition between the check and the creation
+    partitions._known_partitions.clear()
+    monkeypatch.setattr(db.engine.dialect, "has_table", lambda *args, **kwargs: False)
+
+    assert add_record(APICall, timestamp=datetime(2024, 1, 20), username="bob")
+    assert count_records_by_attribute(APICall) == 2
+
+
+def test_delete_records_before(app):
+    db.session.execute(
+        APICall.__table__.insert(),
+        [
+            {"id": 1, "timestamp": datetime(2023, 12, 1), "username": "legacy"},
+            {"id": 2, "timestamp": datetime(2024, 3, 1), "username": "recent legacy"},
+        ],
+    )
+    bulk_insert(
+        APICall,
+        [
+            {"timestamp": datetime(2024, 1, 15), "username": "january"},
+            {"timestamp": datetime(2024, 2, 10), "username": "early february"},
+            {"timestamp": datetime(2024, 2, 20), "username": "late february"},
+        ],
+    )
+
+    # The January partition ends on the cutoff
+    result = delete_records_before(APICall, datetime(2024, 2, 1))
+    assert result["partitions_dropped"] == ["api_call_2024_01"]
+    assert result["rows_deleted"] == 1
+    assert sorted(get_distinct_attribute_values(APICall, "username")) == [
+        "early february",
+        "late february",
+        "recent legacy",
+    ]
+
+    # Only the records of February before the cutoff are deleted
+    result = delete_records_before(APICall, datetime(2024, 2, 15))
+    assert result == {"status": "success", "rows_deleted": 1, "partitions_dropped": []}
+    assert sorted(get_distinct_attribute_values(APICall, "username")) == [
+        "late february",
+        "recent legacy",
+    ]
@@ -0,0 +1,47 @@
+import serialization
+
+
+def cell(value, cell_type):
+    return {"Value": value, "Type": cell_type}
+
+
+def test_to_columnar_declares_one_type_per_column():
+    data = [
+        [cell("SPX Index", "string"), cell(1.5, "float")],
+        [cell("SX5E Index", "string"), cell(2.5, "float")],
+    ]
+
+    assert serialization.to_columnar(data) == {
+        "format": "columnar",
+        "rows": 2,
+        "columns": [
+            {"Type": "string", "Values": ["SPX Index", "SX5E Index"]},
+            {"Type": "float", "Values": [1.5, 2.5]},
+        ],
+    }
+
+
+def test_to_columnar_with_ragged_and_mixed_rows():
+    data = [
+        [cell("SPX Index", "string"), cell(1.5, "float"), cell("2024-01-31", "date")],
+        [cell("AIR Error: missing strike", "string")],
+        [cell("SX5E Index", "string"), cell("n/a", "string")],
+    ]
+
+    columns = serialization.to_columnar(data)["columns"]
+
+    # Padding cells are null and do not make a column mixed
+    assert columns[0] == {
+        "Type": "string",
+        "Values": ["SPX Index", "AIR Error: missing strike", "SX5E Index"],
+    }
+    assert columns[2] == {"Type": "date", "Values": ["2024-01-31", None, None]}
+    assert columns[1] == {
+        "Type": "mixed",
+        "Types": ["float", None, "string"],
+        "Values": [1.5, None, "n/a"],
+    }
+
+
+def test_to_columnar_without_rows():
+    assert serialization.to_columnar([]) == {"format": "columnar", "rows": 0, "columns": []}